@@ -1,23 +1,54 @@
 import os
 import json
-from datetime import datetime, timedelta
+import tempfile
+from datetime import date, datetime
+from functools import lru_cache
 
+import pandas as pd
 import streamlit as st
 from openai import OpenAI  # example client
 
 # Set your API key (safe place: environment variable)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+# Bound each request and let the client retry transient errors
+# (rate limits, 5xx) with exponential backoff instead of hanging the UI.
+LLM_TIMEOUT_SECONDS = 15.0
+LLM_MAX_RETRIES = 3
+client = OpenAI(
+    api_key=OPENAI_API_KEY,
+    timeout=LLM_TIMEOUT_SECONDS,
+    max_retries=LLM_MAX_RETRIES,
+) if OPENAI_API_KEY else None
+
+LLM_ADJUSTMENT_FIELDS = (
+    '"boost_subjects": [str], "reduce_subjects": [str], '
+    '"day_weights": {"Monday": 1.0, ...}, '
+    '"priority_changes": {"<subject>": "High"|"Medium"|"Low"}'
+)
+LLM_SYSTEM_PROMPT = (
+    "You adjust a student's weekly study plan. Reply with a JSON object: "
+    "{" + LLM_ADJUSTMENT_FIELDS + "}."
+)
+LLM_BATCH_SYSTEM_PROMPT = (
+    "You adjust a student's weekly study plan. You get numbered instructions; "
+    'reply with a JSON object {"adjustments": [...]} holding one object per '
+    'instruction, each shaped {"index": <instruction number>, '
+    + LLM_ADJUSTMENT_FIELDS + "}."
+)
+# Instructions per LLM request; larger batches stop paying off
+LLM_BATCH_SIZE = 10
 
 TASKS_FILE = "tasks.json"
 DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Sort rank per priority (High first); unknown values rank as Medium
+PRIORITY_ORDER = {"High": 1, "Medium": 2, "Low": 3}
 
 
 # ------------ Data layer ------------
 
-def load_tasks():
-    if not os.path.exists(TASKS_FILE):
-        return []
+@st.cache_data(show_spinner=False)
+def load_tasks_cached(mtime_ns):
+    # mtime_ns is only the cache key: a changed file means a new entry
     try:
         with open(TASKS_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
@@ -25,165 +56,353 @@ def load_tasks():
         return []
 
 
+def load_tasks():
+    try:
+        mtime_ns = os.stat(TASKS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    tasks = load_tasks_cached(mtime_ns)
+
+    # Older files only have the deadline string; add the ordinal once
+    missing = [t for t in tasks if "deadline_ord" not in t]
+    if missing:
+        for t in missing:
+            set_deadline_ord(t)
+        save_tasks(tasks)
+    return tasks
+
+
 def save_tasks(tasks):
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, indent=2)
+    # Serialize up front, write a private temp file next to tasks.json
+    # and swap it in atomically, so neither a crash mid-write nor two
+    # concurrent saves can leave a truncated tasks.json behind.
+    data = json.dumps(tasks, indent=2)
+    tasks_path = os.path.abspath(TASKS_FILE)
+    fd, tmp_file = tempfile.mkstemp(
+        dir=os.path.dirname(tasks_path),
+        prefix=os.path.basename(tasks_path) + ".",
+        suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the usual tasks.json mode
+        try:
+            os.chmod(tmp_file, os.stat(tasks_path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, tasks_path)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
+    load_tasks_cached.clear()
+
+
+def store_tasks(tasks):
+    """
+    Save tasks and refresh the session copies derived from them,
+    so reruns can reuse the subject list instead of rescanning tasks.
+    """
+    save_tasks(tasks)
+    st.session_state["tasks"] = tasks
+    st.session_state["subjects"] = sorted({t["subject"] for t in tasks})
 
 
 # ------------ Helpers ------------
 
+@lru_cache(maxsize=2048)
 def parse_date(date_str):
+    # Fast path for the canonical YYYY-MM-DD form we write ourselves
+    # (ASCII digits only: int() would also take signs, "_", spaces, other digits)
+    if (
+        len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-"
+        and date_str.isascii()
+        and date_str[0:4].isdigit() and date_str[5:7].isdigit() and date_str[8:10].isdigit()
+    ):
+        try:
+            return date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+        except ValueError:
+            pass
     try:
         return datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
         return None
 
 
-def priority_order(priority):
-    mapping = {"High": 1, "Medium": 2, "Low": 3}
-    return mapping.get(priority, 2)
-
+def set_deadline_ord(task):
+    # Ordinal next to the display string: planning compares plain ints
+    d = parse_date(task["deadline"])
+    task["deadline_ord"] = d.toordinal() if d else None
 
-# ------------ Planning logic ------------
-
-def generate_plan(tasks, available_hours):
-    today = datetime.today().date()
 
-    active_tasks = [t for t in tasks if not t.get("completed", False)]
-    if not active_tasks:
-        return {}, []
+def task_aggregates(tasks, today):
+    """
+    Single pass over tasks for what the UI shows on every rerun:
+    pending tasks that are overdue / due within 3 days.
+    """
+    today_ord = today.toordinal()
+    overdue = []
+    due_soon = []
+    for t in tasks:
+        if t.get("completed", False):
+            continue
+        d = t["deadline_ord"]
+        if d is None:
+            continue
+        if d < today_ord:
+            overdue.append(t)
+        elif d - today_ord <= 3:
+            due_soon.append(t)
+    return overdue, due_soon
 
-    active_tasks.sort(
-        key=lambda t: (
-            parse_date(t["deadline"]) or today,
-            priority_order(t["priority"])
-        )
-    )
 
-    remaining = {id(t): float(t["hours"]) for t in active_tasks}
-    plan = {day: [] for day in DAYS}
+# ------------ Planning logic ------------
 
-    for i in range(7):
-        current_date = today + timedelta(days=i)
-        day_name = DAYS[current_date.weekday() % 7]
-        remaining_today = float(available_hours.get(day_name, 0.0))
+def allocate_hours(remaining, deadline_offsets, daily_hours):
+    """
+    Greedy fill kernel over plain numbers, kept free of task dicts.
+    remaining / deadline_offsets are per task (sorted by deadline),
+    daily_hours is per day from today. Returns (day, task, hours) index
+    triples and decrements remaining in place.
+    """
+    n = len(remaining)
+    allocations = []
 
+    # Tasks are sorted by deadline, so the ones already past due on a given
+    # day form a prefix that only grows as the week advances.
+    start = 0
+    for i, remaining_today in enumerate(daily_hours):
         if remaining_today <= 0:
             continue
 
-        for t in active_tasks:
+        while start < n and deadline_offsets[start] < i:
+            start += 1
+
+        for j in range(start, n):
             if remaining_today <= 0:
                 break
 
-            deadline = parse_date(t["deadline"]) or today
-            if current_date > deadline:
+            if remaining[j] <= 0:
                 continue
 
-            tid = id(t)
-            if remaining[tid] <= 0:
-                continue
+            alloc = min(remaining[j], remaining_today)
+            allocations.append((i, j, alloc))
+            remaining[j] -= alloc
+            remaining_today -= alloc
 
-            alloc = min(remaining[tid], remaining_today)
-            if alloc <= 0:
-                continue
+    return allocations
 
-            plan[day_name].append({
-                "title": t["title"],
-                "subject": t["subject"],
-                "hours": round(alloc, 2),
-                "deadline": t["deadline"],
-                "priority": t["priority"],
-            })
 
-            remaining[tid] -= alloc
-            remaining_today -= alloc
+def generate_plan(tasks, available_hours, today=None):
+    if today is None:
+        today = datetime.today().date()
+    today_ord = today.toordinal()
+
+    active_tasks = [t for t in tasks if not t.get("completed", False)]
+    if not active_tasks:
+        return {}, []
+
+    active_tasks.sort(
+        key=lambda t: (
+            t["deadline_ord"] or today_ord,
+            PRIORITY_ORDER.get(t["priority"], 2)
+        )
+    )
+
+    # Parallel per-task lists so the allocation indexes by position
+    # instead of hashing into each task dict on every pass.
+    n = len(active_tasks)
+    deadline_offsets = [
+        (t["deadline_ord"] or today_ord) - today_ord for t in active_tasks
+    ]
+    remaining = [float(t["hours"]) for t in active_tasks]
+    titles = [t["title"] for t in active_tasks]
+    subjects = [t["subject"] for t in active_tasks]
+    priorities = [t["priority"] for t in active_tasks]
+    deadline_strs = [t["deadline"] for t in active_tasks]
+
+    first_weekday = today.weekday()
+    day_name_by_i = [DAYS[(first_weekday + i) % 7] for i in range(7)]
+    daily_hours = [float(available_hours.get(day, 0.0)) for day in day_name_by_i]
+
+    plan = {day: [] for day in DAYS}
+    # Bound append per day index: no dict or attribute lookup per session
+    day_appends = [plan[day].append for day in day_name_by_i]
+    for i, j, alloc in allocate_hours(remaining, deadline_offsets, daily_hours):
+        day_appends[i]({
+            "title": titles[j],
+            "subject": subjects[j],
+            "hours": round(alloc, 2),
+            "deadline": deadline_strs[j],
+            "priority": priorities[j],
+        })
 
-    unfilled = [t for t in active_tasks if remaining[id(t)] > 0.01]
     return plan, [
         {
-            "title": t["title"],
-            "subject": t["subject"],
-            "remaining": round(remaining[id(t)], 2),
-            "deadline": t["deadline"]
+            "title": titles[j],
+            "subject": subjects[j],
+            "remaining": round(remaining[j], 2),
+            "deadline": deadline_strs[j]
         }
-        for t in unfilled
+        for j in range(n)
+        if remaining[j] > 0.01
     ]
 
 
-def apply_instruction_with_llm(instruction, tasks, available_hours):
-    """
-    Use an LLM to lightly adjust priorities / available hours
-    based on a natural language instruction.
-    This keeps it simple but gives real 'agent' behavior.
-    """
-    if not client or not OPENAI_API_KEY:
-        # No key: just return original
-        return tasks, available_hours
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_plan(tasks_json, hours_json, today_iso):
+    # Plan for the same day the cache is keyed on: the same inputs plan
+    # differently tomorrow, so the date is part of the key
+    return generate_plan(
+        json.loads(tasks_json), json.loads(hours_json), date.fromisoformat(today_iso)
+    )
 
-    # Prepare a compact description of current situation
-    subjects = sorted({t["subject"] for t in tasks})
-    summary = {
-        "subjects": subjects,
-        "available_hours": available_hours,
-    }
 
-    prompt = (
-        "You are an AI study planner agent.\n"
-        "User will give an instruction about how to adjust their weekly plan.\n"
-        "You will respond ONLY with a small JSON object, no explanation.\n"
-        "Format:\n"
-        "{\n"
-        '  "boost_subjects": [list of subjects to emphasize],\n'
-        '  "reduce_subjects": [list of subjects to de-emphasize],\n'
-        '  "day_weights": { "Monday": 1.0, "Tuesday": 1.0, ... },\n'
-        '  "priority_changes": { "AI": "High", "Java": "Medium" }\n'
-        "}\n\n"
-        f"Current context: {json.dumps(summary)}\n\n"
-        f"User instruction: {instruction}\n"
+@st.cache_data(ttl=3600, show_spinner=False)
+def llm_adjust(instructions, summary_json):
+    """
+    Raw LLM reply for a batch of instructions in a given context.
+    A single instruction gets one plain adjustment object back; larger
+    batches get {"adjustments": [...]} with an "index" per entry.
+    Cached on (instructions, context) so repeating the same request
+    skips the API round trip; failures raise and are not cached.
+    """
+    if len(instructions) == 1:
+        system_prompt = LLM_SYSTEM_PROMPT
+        user_prompt = f"Context: {summary_json}\nInstruction: {instructions[0]}"
+    else:
+        numbered = "\n".join(f"{k}. {text}" for k, text in enumerate(instructions, start=1))
+        system_prompt = LLM_BATCH_SYSTEM_PROMPT
+        user_prompt = f"Context: {summary_json}\nInstructions:\n{numbered}"
+
+    # JSON mode guarantees a parseable object, so the format only needs
+    # to be described once, compactly, in the system prompt.
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",  # example; choose suitable cheap model
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.2,
+        response_format={"type": "json_object"},
     )
+    return response.choices[0].message.content.strip()
 
-    try:
-        # Simple chat completion call (adjust model name to what you actually use)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # example; choose suitable cheap model
-            messages=[
-                {"role": "system", "content": "You are a strict JSON generator for a study planner agent."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-        )
-        content = response.choices[0].message.content.strip()
-        # Attempt to parse JSON from content
-        data = json.loads(content)
-    except Exception:
-        # If anything fails, just return original
-        return tasks, available_hours
 
+def apply_adjustment(data, tasks, available_hours):
+    """
+    Apply one parsed LLM adjustment (day_weights / priority_changes)
+    to tasks and available hours, returning the adjusted copies.
+    """
     # Apply day_weights to available_hours
+    # JSON mode guarantees valid JSON, not this shape: ignore anything
+    # that is not a mapping rather than failing the whole adjustment.
     day_weights = data.get("day_weights", {})
+    if not isinstance(day_weights, dict):
+        day_weights = {}
     new_available = available_hours.copy()
     for day, w in day_weights.items():
         if day in new_available:
             try:
                 new_available[day] = max(0.0, float(new_available[day]) * float(w))
-            except ValueError:
+            except (TypeError, ValueError):
                 pass
 
-    # Apply priority_changes
+    # Apply priority_changes; only tasks that actually change are copied,
+    # the rest are shared with the caller's list.
     priority_changes = data.get("priority_changes", {})
-    new_tasks = []
-    for t in tasks:
-        t2 = t.copy()
-        subj = t2["subject"]
-        if subj in priority_changes:
-            new_pr = priority_changes[subj]
-            if new_pr in ["High", "Medium", "Low"]:
-                t2["priority"] = new_pr
-        new_tasks.append(t2)
+    if not isinstance(priority_changes, dict):
+        priority_changes = {}
+    priority_changes = {
+        subj: pr
+        for subj, pr in priority_changes.items()
+        if pr in ["High", "Medium", "Low"]
+    }
+    if not priority_changes:
+        new_tasks = tasks
+    else:
+        new_tasks = [
+            {**t, "priority": priority_changes[t["subject"]]}
+            if t["subject"] in priority_changes else t
+            for t in tasks
+        ]
 
     return new_tasks, new_available
 
 
+def split_adjustments(reply, count):
+    """
+    Demultiplex a parsed llm_adjust reply into one adjustment dict
+    (or None) per instruction. Batch entries are matched on their
+    "index" field, so a dropped entry cannot shift the ones after it.
+    """
+    if not isinstance(reply, dict):
+        return [None] * count
+    if count == 1:
+        return [reply]
+
+    adjustments = reply.get("adjustments")
+    by_index = {}
+    if isinstance(adjustments, list):
+        for adj in adjustments:
+            if isinstance(adj, dict) and isinstance(adj.get("index"), int):
+                by_index.setdefault(adj["index"], adj)
+    return [by_index.get(k) for k in range(1, count + 1)]
+
+
+def apply_instructions_with_llm(instructions, tasks, available_hours, subjects=None):
+    """
+    Batched form of apply_instruction_with_llm: one (tasks, available_hours)
+    result per instruction, in order. Instructions are sent LLM_BATCH_SIZE
+    at a time in a single request each, which saves the per-request
+    overhead and rate-limit budget of prompting them one by one.
+    Any instruction whose adjustment fails gets the originals back.
+    """
+    if not client or not OPENAI_API_KEY:
+        # No key: just return original
+        return [(tasks, available_hours) for _ in instructions]
+
+    # Prepare a compact description of current situation.
+    # This is all the model sees, so it doubles as the cache key.
+    if subjects is None:
+        subjects = sorted({t["subject"] for t in tasks})
+    summary = {
+        "subjects": subjects,
+        "available_hours": available_hours,
+    }
+    summary_json = json.dumps(summary, sort_keys=True)
+
+    results = []
+    for start in range(0, len(instructions), LLM_BATCH_SIZE):
+        batch = tuple(instructions[start:start + LLM_BATCH_SIZE])
+        try:
+            # JSON mode: the reply is always a single JSON object
+            reply = json.loads(llm_adjust(batch, summary_json))
+        except Exception:
+            # If anything fails, just return original
+            reply = None
+
+        for data in split_adjustments(reply, len(batch)):
+            if data is None:
+                results.append((tasks, available_hours))
+            else:
+                results.append(apply_adjustment(data, tasks, available_hours))
+
+    return results
+
+
+def apply_instruction_with_llm(instruction, tasks, available_hours, subjects=None):
+    """
+    Use an LLM to lightly adjust priorities / available hours
+    based on a natural language instruction.
+    This keeps it simple but gives real 'agent' behavior.
+    Pass subjects (sorted) if already computed to skip another scan of tasks.
+    """
+    return apply_instructions_with_llm([instruction], tasks, available_hours, subjects)[0]
+
+
 def reschedule_missed_day(tasks, available_hours, day_name):
     """
     Take all sessions planned for a given day_name and push their hours
@@ -209,8 +428,13 @@ st.write(
 
 if "tasks" not in st.session_state:
     st.session_state["tasks"] = load_tasks()
+if "subjects" not in st.session_state:
+    st.session_state["subjects"] = sorted({t["subject"] for t in st.session_state["tasks"]})
 
 tasks = st.session_state["tasks"]
+subjects = st.session_state["subjects"]
+today = datetime.today().date()
+overdue, due_soon = task_aggregates(tasks, today)
 
 tab_tasks, tab_plan = st.tabs(["📝 Tasks", "📆 Weekly Plan"])
 
@@ -239,9 +463,9 @@ with tab_tasks:
                 "priority": priority,
                 "completed": False,
             }
+            set_deadline_ord(new_task)
             tasks.append(new_task)
-            save_tasks(tasks)
-            st.session_state["tasks"] = tasks
+            store_tasks(tasks)
             st.success("Task added.")
             st.rerun()
 
@@ -264,7 +488,6 @@ with tab_tasks:
             st.metric("Completion", f"{pct}%")
 
         st.markdown("### Filter by subject")
-        subjects = sorted(list({t["subject"] for t in tasks}))
         subject_filter = st.selectbox(
             "Show tasks for subject",
             options=["All"] + subjects,
@@ -272,94 +495,95 @@ with tab_tasks:
             help="Filter tasks by course/subject."
         )
 
-        for idx, t in enumerate(tasks):
-            if subject_filter != "All" and t["subject"] != subject_filter:
-                continue
+        # One editable grid instead of per-row buttons and edit forms.
+        # Editor row positions map back to task indexes via shown_idx.
+        shown_idx = [
+            idx for idx, t in enumerate(tasks)
+            if subject_filter == "All" or t["subject"] == subject_filter
+        ]
+        rows = pd.DataFrame(
+            [
+                {
+                    "title": tasks[idx]["title"],
+                    "subject": tasks[idx]["subject"],
+                    "deadline": parse_date(tasks[idx]["deadline"]),
+                    "hours": float(tasks[idx]["hours"]),
+                    "priority": tasks[idx]["priority"],
+                    "completed": tasks[idx].get("completed", False),
+                }
+                for idx in shown_idx
+            ],
+            columns=["title", "subject", "deadline", "hours", "priority", "completed"],
+        )
 
-            with st.container():
-                cols = st.columns([4, 2, 2, 2, 1, 1])
-                with cols[0]:
-                    st.markdown(f"**{t['title']}**  \n_{t['subject']}_")
-                with cols[1]:
-                    st.markdown(f"Deadline: `{t['deadline']}`")
-                with cols[2]:
-                    st.markdown(f"Hours: **{t['hours']}**")
-                with cols[3]:
-                    status = "✅ Completed" if t.get("completed", False) else "⏳ Pending"
-                    st.markdown(f"Priority: **{t['priority']}**  \nStatus: {status}")
-
-                # Done button
-                with cols[4]:
-                    if st.button("Done", key=f"done-{idx}"):
-                        tasks[idx]["completed"] = True
-                        save_tasks(tasks)
-                        st.session_state["tasks"] = tasks
-                        st.rerun()
-
-                # Edit / Delete buttons
-                with cols[5]:
-                    edit_key = f"edit-{idx}"
-                    delete_key = f"del-{idx}"
-                    if st.button("✏️", key=edit_key):
-                        st.session_state["edit_index"] = idx
-                    if st.button("🗑", key=delete_key):
-                        tasks.pop(idx)
-                        save_tasks(tasks)
-                        st.session_state["tasks"] = tasks
-                        st.rerun()
-
-            # If this row is in edit mode, show inline edit form
-            if st.session_state.get("edit_index") == idx:
-                st.markdown("**Edit this task:**")
-                e_col1, e_col2 = st.columns(2)
-                with e_col1:
-                    new_title = st.text_input(
-                        "Title",
-                        value=t["title"],
-                        key=f"edit-title-{idx}"
-                    )
-                    new_subject = st.text_input(
-                        "Subject / Course",
-                        value=t["subject"],
-                        key=f"edit-subject-{idx}"
-                    )
-                with e_col2:
-                    new_deadline = st.date_input(
-                        "Deadline",
-                        value=parse_date(t["deadline"]) or datetime.today().date(),
-                        key=f"edit-deadline-{idx}"
-                    )
-                    new_hours = st.number_input(
-                        "Estimated hours",
-                        min_value=0.5,
-                        step=0.5,
-                        value=float(t["hours"]),
-                        key=f"edit-hours-{idx}"
-                    )
-                    new_priority = st.selectbox(
-                        "Priority",
-                        ["High", "Medium", "Low"],
-                        index=["High", "Medium", "Low"].index(t["priority"]),
-                        key=f"edit-priority-{idx}"
-                    )
-
-                c1, c2 = st.columns(2)
-                with c1:
-                    if st.button("💾 Save changes", key=f"save-{idx}"):
-                        t["title"] = new_title.strip()
-                        t["subject"] = new_subject.strip()
-                        t["deadline"] = new_deadline.strftime("%Y-%m-%d")
-                        t["hours"] = float(new_hours)
-                        t["priority"] = new_priority
-                        save_tasks(tasks)
-                        st.session_state["tasks"] = tasks
-                        st.session_state["edit_index"] = None
-                        st.success("Task updated.")
-                        st.rerun()
-                with c2:
-                    if st.button("Cancel", key=f"cancel-{idx}"):
-                        st.session_state["edit_index"] = None
-                        st.rerun()
+        # Bumped after every save so the editor starts from a clean diff
+        editor_key = f"tasks-editor-{st.session_state.get('tasks_editor_version', 0)}"
+        st.data_editor(
+            rows,
+            key=editor_key,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "title": st.column_config.TextColumn("Title", required=True),
+                "subject": st.column_config.TextColumn("Subject / Course", required=True),
+                "deadline": st.column_config.DateColumn("Deadline", format="YYYY-MM-DD", required=True),
+                "hours": st.column_config.NumberColumn("Estimated hours", min_value=0.5, step=0.5, required=True),
+                "priority": st.column_config.SelectboxColumn(
+                    "Priority", options=["High", "Medium", "Low"], required=True
+                ),
+                "completed": st.column_config.CheckboxColumn("Done"),
+            },
+        )
+
+        changes = st.session_state[editor_key]
+        if changes["edited_rows"] or changes["deleted_rows"] or changes["added_rows"]:
+            for pos, edits in changes["edited_rows"].items():
+                t = tasks[shown_idx[int(pos)]]
+                for col, val in edits.items():
+                    if val is None:
+                        continue
+                    if col in ("title", "subject"):
+                        if val.strip():
+                            t[col] = val.strip()
+                    elif col == "deadline":
+                        # Date cells come back as ISO strings
+                        if parse_date(str(val)[:10]):
+                            t["deadline"] = str(val)[:10]
+                            set_deadline_ord(t)
+                    elif col == "hours":
+                        t["hours"] = float(val)
+                    elif col == "priority":
+                        t["priority"] = val
+                    elif col == "completed":
+                        t["completed"] = bool(val)
+
+            if changes["deleted_rows"]:
+                deleted = {shown_idx[pos] for pos in changes["deleted_rows"]}
+                tasks = [t for idx, t in enumerate(tasks) if idx not in deleted]
+
+            for row in changes["added_rows"]:
+                row_title = (row.get("title") or "").strip()
+                row_subject = (row.get("subject") or "").strip()
+                row_deadline = str(row.get("deadline") or "")[:10]
+                if not row_title or not row_subject or not parse_date(row_deadline):
+                    continue
+                new_task = {
+                    "title": row_title,
+                    "subject": row_subject,
+                    "deadline": row_deadline,
+                    "hours": float(row.get("hours") or 2.0),
+                    "priority": row.get("priority") or "Medium",
+                    "completed": bool(row.get("completed", False)),
+                }
+                set_deadline_ord(new_task)
+                tasks.append(new_task)
+
+            store_tasks(tasks)
+            st.session_state["tasks_editor_version"] = (
+                st.session_state.get("tasks_editor_version", 0) + 1
+            )
+            st.rerun()
 
 # ----- Plan tab -----
 with tab_plan:
@@ -391,18 +615,6 @@ with tab_plan:
         )
 
     # Overdue & due-soon highlighting in tasks (just info text)
-    today = datetime.today().date()
-    overdue = []
-    due_soon = []
-    for t in tasks:
-        d = parse_date(t["deadline"])
-        if not d or t.get("completed", False):
-            continue
-        if d < today:
-            overdue.append(t)
-        elif 0 <= (d - today).days <= 3:
-            due_soon.append(t)
-
     if overdue:
         st.error("⚠ Overdue tasks:")
         for t in overdue:
@@ -441,11 +653,22 @@ with tab_plan:
         available_for_plan = available
 
         if use_instruction and instruction.strip():
-            tasks_for_plan, available_for_plan = apply_instruction_with_llm(
-                instruction.strip(), tasks, available
-            )
-
-        plan, unfilled = generate_plan(tasks_for_plan, available_for_plan)
+            with st.spinner("Asking the AI agent to adjust your week..."):
+                tasks_for_plan, available_for_plan = apply_instruction_with_llm(
+                    instruction.strip(), tasks, available, subjects
+                )
+            # The originals come back untouched when no key is set or the call fails
+            if available_for_plan is not available:
+                st.success("✨ AI has adjusted your plan based on your instruction!")
+            else:
+                st.warning("AI instruction could not be applied; using your current tasks and hours.")
+
+        # Keyed on the inputs, so repeated clicks with unchanged data are free
+        plan, unfilled = cached_plan(
+            json.dumps(tasks_for_plan, sort_keys=True),
+            json.dumps(available_for_plan, sort_keys=True),
+            today.isoformat(),
+        )
         st.session_state["latest_plan"] = plan
         st.session_state["latest_unfilled"] = unfilled
 
@@ -456,14 +679,6 @@ with tab_plan:
         st.session_state["latest_unfilled"] = unfilled
         st.info("Regenerated plan assuming today's sessions were missed.")
 
-    if use_instruction and instruction.strip():
-        # Use LLM to adjust plan based on user instruction
-        adjusted_tasks, adjusted_available = apply_instruction_with_llm(instruction, tasks, available)
-        plan, unfilled = generate_plan(adjusted_tasks, adjusted_available)
-        st.session_state["latest_plan"] = plan
-        st.session_state["latest_unfilled"] = unfilled
-        st.success("✨ AI has adjusted your plan based on your instruction!")
-
     plan = st.session_state.get("latest_plan")
     unfilled = st.session_state.get("latest_unfilled")
 
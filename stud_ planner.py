@@ -1,11 +1,16 @@
 import json
 import os
-from datetime import datetime, timedelta
+import tempfile
+from datetime import date, datetime
+from functools import lru_cache
 
 TASKS_FILE = "tasks.json"
 
 DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
+# Map priority to numeric (High first)
+PRIORITY_ORDER = {"High": 1, "Medium": 2, "Low": 3}
+
 
 # ------------ Data layer ------------
 
@@ -14,28 +19,81 @@ def load_tasks():
         return []
     with open(TASKS_FILE, "r", encoding="utf-8") as f:
         try:
-            return json.load(f)
+            tasks = json.load(f)
         except json.JSONDecodeError:
             return []
 
+    # Older files only have the deadline string; add the ordinal once
+    missing = [t for t in tasks if "deadline_ord" not in t]
+    if missing:
+        for t in missing:
+            set_deadline_ord(t)
+        save_tasks(tasks)
+    return tasks
+
 
 def save_tasks(tasks):
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, indent=2)
+    # Serialize up front, write a private temp file next to tasks.json
+    # and swap it in atomically, so neither a crash mid-write nor two
+    # concurrent saves can leave a truncated tasks.json behind.
+    data = json.dumps(tasks, indent=2)
+    tasks_path = os.path.abspath(TASKS_FILE)
+    fd, tmp_file = tempfile.mkstemp(
+        dir=os.path.dirname(tasks_path),
+        prefix=os.path.basename(tasks_path) + ".",
+        suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the usual tasks.json mode
+        try:
+            os.chmod(tmp_file, os.stat(tasks_path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, tasks_path)
+    except BaseException:
+        os.unlink(tmp_file)
+        raise
 
 
 # ------------ Helper functions ------------
 
+@lru_cache(maxsize=2048)
 def parse_date(date_str):
     """
     Parse date in format YYYY-MM-DD.
+    Slices the canonical form (ASCII digits only) directly and falls back
+    to strptime for anything else (e.g. unpadded months), so the accepted
+    inputs stay exactly those strptime accepts.
     """
+    if (
+        len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-"
+        and date_str.isascii()
+        and date_str[0:4].isdigit() and date_str[5:7].isdigit() and date_str[8:10].isdigit()
+    ):
+        try:
+            return date(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]))
+        except ValueError:
+            pass
     try:
         return datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
         return None
 
 
+def set_deadline_ord(task):
+    """
+    Store the deadline as a date ordinal next to the display string,
+    so planning compares plain ints instead of parsing dates.
+    None if the deadline string is not a valid date.
+    """
+    d = parse_date(task["deadline"])
+    task["deadline_ord"] = d.toordinal() if d else None
+
+
 def print_tasks(tasks):
     if not tasks:
         print("\nNo tasks yet.\n")
@@ -86,6 +144,7 @@ def add_task(tasks):
         "priority": priority,
         "completed": False
     }
+    set_deadline_ord(task)
     tasks.append(task)
     save_tasks(tasks)
     print("\nTask added successfully!\n")
@@ -139,6 +198,44 @@ def get_available_hours():
     return available
 
 
+def allocate_hours(remaining, deadline_offsets, daily_hours):
+    """
+    Greedy allocation core, working on plain numbers only:
+    - remaining / deadline_offsets are per task, already sorted by deadline.
+    - daily_hours is per day, starting today.
+    Returns (day index, task index, hours) triples; remaining is updated in place.
+    """
+    n = len(remaining)
+    allocations = []
+
+    # Tasks are sorted by deadline, so the ones already past due on a given
+    # day form a prefix that only grows as the week advances.
+    start = 0
+    for i, remaining_hours_today in enumerate(daily_hours):
+        if remaining_hours_today <= 0:
+            continue
+
+        # Do not schedule after deadline
+        while start < n and deadline_offsets[start] < i:
+            start += 1
+
+        for j in range(start, n):
+            if remaining_hours_today <= 0:
+                break
+
+            if remaining[j] <= 0:
+                continue
+
+            # Allocate min(remaining task hours, remaining today)
+            alloc = min(remaining[j], remaining_hours_today)
+            allocations.append((i, j, alloc))
+
+            remaining[j] -= alloc
+            remaining_hours_today -= alloc
+
+    return allocations
+
+
 def generate_plan(tasks, available_hours):
     """
     Very simple planner:
@@ -147,6 +244,7 @@ def generate_plan(tasks, available_hours):
     - Iterates day by day from today, assigns hours until each task is filled.
     """
     today = datetime.today().date()
+    today_ord = today.toordinal()
 
     # Filter active tasks
     active_tasks = [
@@ -158,60 +256,44 @@ def generate_plan(tasks, available_hours):
         print("\nNo pending tasks to plan.\n")
         return
 
-    # Map priority to numeric (High first)
-    priority_order = {"High": 1, "Medium": 2, "Low": 3}
-
     # Sort tasks by deadline then priority
     active_tasks.sort(
         key=lambda t: (
-            parse_date(t["deadline"]) or today,
-            priority_order.get(t["priority"], 2)
+            t["deadline_ord"] or today_ord,
+            PRIORITY_ORDER.get(t["priority"], 2)
         )
     )
 
-    # Remaining hours per task
-    remaining = {id(t): t["hours"] for t in active_tasks}
+    # Per-task fields as parallel lists, indexed by position in the
+    # sorted order (deadlines as day offsets from today)
+    n = len(active_tasks)
+    deadline_offsets = [
+        (t["deadline_ord"] or today_ord) - today_ord for t in active_tasks
+    ]
+    remaining = [float(t["hours"]) for t in active_tasks]
+    titles = [t["title"] for t in active_tasks]
+    subjects = [t["subject"] for t in active_tasks]
+    priorities = [t["priority"] for t in active_tasks]
+    deadline_strs = [t["deadline"] for t in active_tasks]
+
+    # Available hours for the next 7 days (this week-like)
+    first_weekday = today.weekday()
+    day_name_by_i = [DAYS[(first_weekday + i) % 7] for i in range(7)]
+    daily_hours = [float(available_hours.get(day, 0.0)) for day in day_name_by_i]
 
     # Initialize plan
     plan = {day: [] for day in DAYS}
-
-    # Plan for next 7 days (this week-like)
-    for i in range(7):
-        current_date = today + timedelta(days=i)
-        day_name = DAYS[current_date.weekday() % 7]
-        remaining_hours_today = available_hours.get(day_name, 0.0)
-
-        if remaining_hours_today <= 0:
-            continue
-
-        for t in active_tasks:
-            if remaining_hours_today <= 0:
-                break
-
-            d = parse_date(t["deadline"]) or today
-            # Do not schedule after deadline
-            if current_date > d:
-                continue
-
-            task_id = id(t)
-            if remaining[task_id] <= 0:
-                continue
-
-            # Allocate min(remaining task hours, remaining today)
-            alloc = min(remaining[task_id], remaining_hours_today)
-            if alloc <= 0:
-                continue
-
-            plan[day_name].append({
-                "title": t["title"],
-                "subject": t["subject"],
-                "hours": round(alloc, 2),
-                "deadline": t["deadline"],
-                "priority": t["priority"]
-            })
-
-            remaining[task_id] -= alloc
-            remaining_hours_today -= alloc
+    # Bound append per day index: no dict or attribute lookup per session
+    day_appends = [plan[day].append for day in day_name_by_i]
+
+    for i, j, alloc in allocate_hours(remaining, deadline_offsets, daily_hours):
+        day_appends[i]({
+            "title": titles[j],
+            "subject": subjects[j],
+            "hours": round(alloc, 2),
+            "deadline": deadline_strs[j],
+            "priority": priorities[j]
+        })
 
     # Print plan
     print("\n--- Weekly Study Plan (Simple Agent) ---\n")
@@ -230,13 +312,13 @@ def generate_plan(tasks, available_hours):
         print()
 
     # Warn about any tasks that still have remaining hours
-    unfilled = [t for t in active_tasks if remaining[id(t)] > 0.01]
+    unfilled = [j for j in range(n) if remaining[j] > 0.01]
     if unfilled:
         print("⚠ Warning: Not enough available hours to fully cover these tasks:")
-        for t in unfilled:
+        for j in unfilled:
             print(
-                f"  - {t['title']} ({t['subject']}) "
-                f"needs ~{round(remaining[id(t)], 2)} more hour(s) before {t['deadline']}"
+                f"  - {titles[j]} ({subjects[j]}) "
+                f"needs ~{round(remaining[j], 2)} more hour(s) before {deadline_strs[j]}"
             )
         print()
 